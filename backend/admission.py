@@ -0,0 +1,200 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+MAX_TRACKED_KEYS = 100_000
+MAX_GENERATION_CONCURRENCY = 4
+MAX_GENERATION_QUEUE = 16
+MAX_VALIDATION_CONCURRENCY = 1
+MAX_VALIDATION_QUEUE = 2
+UNKNOWN_KEY = "unknown"
+TRUSTED_PROXY_HEADER = os.environ.get("TRUSTED_PROXY_HEADER", "").strip().lower()
+
+
+@dataclass(frozen=True)
+class Limit:
+    rate: float
+    burst: float
+
+
+SID_LIMITS: Dict[str, Limit] = {
+    "fill_cell": Limit(rate=10, burst=20),
+    "heartbeat": Limit(rate=1, burst=5),
+    "ready": Limit(rate=1, burst=3),
+    "restart_game": Limit(rate=0.2, burst=2),
+    "join_room": Limit(rate=1, burst=5),
+    "reconnect": Limit(rate=1, burst=5),
+    "request_candidates": Limit(rate=2, burst=5),
+    "request_hint": Limit(rate=0.5, burst=3),
+}
+
+IP_LIMITS: Dict[str, Limit] = {
+    "connect": Limit(rate=2, burst=20),
+    "fill_cell": Limit(rate=40, burst=80),
+    "heartbeat": Limit(rate=5, burst=20),
+    "ready": Limit(rate=2, burst=10),
+    "restart_game": Limit(rate=0.5, burst=5),
+    "join_room": Limit(rate=2, burst=20),
+    "reconnect": Limit(rate=2, burst=20),
+    "request_candidates": Limit(rate=5, burst=20),
+    "request_hint": Limit(rate=1, burst=10),
+    "room_create": Limit(rate=0.5, burst=10),
+    "room_join": Limit(rate=1, burst=20),
+    "puzzle_generate": Limit(rate=0.5, burst=5),
+    "room_info": Limit(rate=5, burst=30),
+    "room_candidates": Limit(rate=2, burst=10),
+    "room_hint": Limit(rate=0.5, burst=5),
+    "puzzle_validate": Limit(rate=0.2, burst=3),
+}
+
+ROOM_LIMITS: Dict[str, Limit] = {
+    "restart_game": Limit(rate=0.1, burst=2),
+}
+
+
+def client_ip(scope: Optional[Mapping[str, Any]]) -> str:
+    if not scope:
+        return ""
+    if TRUSTED_PROXY_HEADER:
+        header = TRUSTED_PROXY_HEADER.encode("latin-1")
+        for name, value in scope.get("headers") or ():
+            if name.lower() == header:
+                forwarded = value.decode("latin-1").split(",")[-1].strip()
+                if forwarded:
+                    return forwarded
+    client = scope.get("client")
+    return client[0] if client else ""
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, now: float) -> None:
+        self.tokens = tokens
+        self.updated = now
+
+    def take(self, limit: Limit, now: float) -> bool:
+        self.tokens = min(limit.burst, self.tokens + (now - self.updated) * limit.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class RateLimiter:
+    def __init__(self, limits: Dict[str, Limit], max_keys: int = MAX_TRACKED_KEYS) -> None:
+        self.limits = limits
+        self.max_keys = max_keys
+        self.buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self.shed: Dict[str, int] = {name: 0 for name in limits}
+
+    def allow(self, name: str, key: Optional[str]) -> bool:
+        limit = self.limits.get(name)
+        if limit is None:
+            return True
+        now = time.monotonic()
+        bucket_key = (name, key or UNKNOWN_KEY)
+        bucket = self.buckets.get(bucket_key)
+        if bucket is None:
+            bucket = TokenBucket(limit.burst, now)
+            self.buckets[bucket_key] = bucket
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(bucket_key)
+        if bucket.take(limit, now):
+            return True
+        self.shed[name] += 1
+        return False
+
+    def forget(self, key: str) -> None:
+        for name in self.limits:
+            self.buckets.pop((name, key), None)
+
+
+class ServerBusy(Exception):
+    pass
+
+
+class WorkGate:
+    def __init__(self, limit: int, max_queue: int) -> None:
+        self.limit = limit
+        self.max_queue = max_queue
+        self.inflight = 0
+        self.waiting = 0
+        self.shed = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def run(self, work: Callable[[], Awaitable[T]]) -> T:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.limit)
+        if self.inflight >= self.limit and self.waiting >= self.max_queue:
+            self.shed += 1
+            raise ServerBusy()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.inflight += 1
+        try:
+            return await work()
+        finally:
+            self.inflight -= 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {"inflight": self.inflight, "waiting": self.waiting, "limit": self.limit}
+
+
+class AdmissionControl:
+    def __init__(
+        self,
+        max_generation: int = MAX_GENERATION_CONCURRENCY,
+        max_generation_queue: int = MAX_GENERATION_QUEUE,
+        max_validation: int = MAX_VALIDATION_CONCURRENCY,
+        max_validation_queue: int = MAX_VALIDATION_QUEUE,
+    ) -> None:
+        self.by_sid = RateLimiter(SID_LIMITS)
+        self.by_ip = RateLimiter(IP_LIMITS)
+        self.by_room = RateLimiter(ROOM_LIMITS)
+        self.generation = WorkGate(max_generation, max_generation_queue)
+        self.validation = WorkGate(max_validation, max_validation_queue)
+
+    def allow_socket(self, event: str, sid: str, ip: Optional[str]) -> bool:
+        return self.by_ip.allow(event, ip) and self.by_sid.allow(event, sid)
+
+    def allow_ip(self, name: str, ip: Optional[str]) -> bool:
+        return self.by_ip.allow(name, ip)
+
+    def allow_room(self, event: str, room_id: str) -> bool:
+        return self.by_room.allow(event, room_id)
+
+    def forget_sid(self, sid: str) -> None:
+        self.by_sid.forget(sid)
+
+    async def run_generation(self, func: Callable[..., T], *args: Any) -> T:
+        return await self.generation.run(lambda: asyncio.to_thread(func, *args))
+
+    async def run_validation(self, work: Callable[[], Awaitable[T]]) -> T:
+        return await self.validation.run(work)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "shed": {
+                "sid": dict(self.by_sid.shed),
+                "ip": dict(self.by_ip.shed),
+                "room": dict(self.by_room.shed),
+                "generation": self.generation.shed,
+                "validation": self.validation.shed,
+            },
+            "generation": self.generation.stats(),
+            "validation": self.validation.stats(),
+            "tracked_keys": len(self.by_sid.buckets) + len(self.by_ip.buckets) + len(self.by_room.buckets),
+        }
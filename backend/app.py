@@ -1,17 +1,29 @@
 import asyncio
+import json
 import uuid
 from pathlib import Path
+from typing import Annotated, Awaitable, List, Optional, Tuple, TypeVar
 import socketio
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field
 
-from room_manager import RoomManager
+from admission import AdmissionControl, ServerBusy, client_ip
+from move_log import iter_replay_moves, replay_header
+from puzzle_batch import MAX_BATCH_SIZE, MAX_PUZZLE_TEXT, get_pool, shutdown_pool, validate_batch
+from room_manager import Player, Room, RoomManager
+from static_cache import StaticCache, etag_matches
 from sudoku_generator import generate_puzzle
 from websocket_handler import heartbeat_monitor, register_socket_handlers
 
+REPLAY_CHUNK_MOVES = 64
+ROOM_INFO_MAX_WAIT = 30
+BOOT_ID = uuid.uuid4().hex[:8]
+DISCONNECT_POLL_SECONDS = 0.5
+
+T = TypeVar("T")
+
 
 class CreateRoomRequest(BaseModel):
     player_name: str = Field(..., min_length=1, max_length=20)
@@ -27,6 +39,18 @@ class PuzzleRequest(BaseModel):
     difficulty: str = "medium"
 
 
+class ValidatePuzzlesRequest(BaseModel):
+    puzzles: List[Annotated[str, Field(max_length=MAX_PUZZLE_TEXT)]] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_SIZE
+    )
+    node_budget: Optional[int] = Field(None, gt=0)
+    time_budget: Optional[float] = Field(None, gt=0)
+
+
+class PlayerTokenRequest(BaseModel):
+    player_token: str = Field(..., min_length=1)
+
+
 app = FastAPI(title="ShuDuWeb", version="1.0")
 app.add_middleware(
     CORSMiddleware,
@@ -37,26 +61,48 @@ app.add_middleware(
 )
 
 room_manager = RoomManager()
+admission = AdmissionControl()
 
 sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
-register_socket_handlers(sio, room_manager)
+register_socket_handlers(sio, room_manager, admission)
 
 BASE_DIR = Path(__file__).resolve().parent
 STATIC_DIR = BASE_DIR / "static"
 
 
+@app.on_event("startup")
+async def start_puzzle_pool() -> None:
+    get_pool()
+
+
 @app.on_event("startup")
 async def start_heartbeat_monitor() -> None:
     asyncio.create_task(heartbeat_monitor(sio, room_manager))
 
 
+@app.on_event("shutdown")
+async def stop_puzzle_pool() -> None:
+    shutdown_pool()
+
+
 @app.get("/api/health")
 async def health() -> dict:
     return {"ok": True}
 
 
+@app.get("/api/stats")
+async def stats() -> dict:
+    return {"admission": admission.stats(), "rooms": len(room_manager.rooms)}
+
+
+def _client_ip(http_request: Request) -> str:
+    return client_ip(http_request.scope)
+
+
 @app.post("/api/room/create")
-async def create_room(request: CreateRoomRequest) -> dict:
+async def create_room(request: CreateRoomRequest, http_request: Request) -> dict:
+    if not admission.allow_ip("room_create", _client_ip(http_request)):
+        raise HTTPException(status_code=429, detail="rate_limited")
     room, player = room_manager.create_room(request.player_name, request.difficulty)
     return {
         "room_id": room.room_id,
@@ -68,7 +114,9 @@ async def create_room(request: CreateRoomRequest) -> dict:
 
 
 @app.post("/api/room/join")
-async def join_room(request: JoinRoomRequest) -> dict:
+async def join_room(request: JoinRoomRequest, http_request: Request) -> dict:
+    if not admission.allow_ip("room_join", _client_ip(http_request)):
+        raise HTTPException(status_code=429, detail="rate_limited")
     try:
         room, player = room_manager.join_room(request.room_id, request.player_name)
     except ValueError as exc:
@@ -87,10 +135,35 @@ async def join_room(request: JoinRoomRequest) -> dict:
 
 
 @app.get("/api/room/info")
-async def room_info(room_id: str) -> dict:
+async def room_info(room_id: str, http_request: Request, wait: float = 0) -> Response:
+    if not admission.allow_ip("room_info", _client_ip(http_request)):
+        raise HTTPException(status_code=429, detail="rate_limited")
     room = room_manager.get_room(room_id)
     if not room:
         raise HTTPException(status_code=404, detail="room_not_found")
+    if_none_match = http_request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, _room_etag(room)) and wait > 0:
+        await room_manager.wait_for_change(room, room.version, min(wait, ROOM_INFO_MAX_WAIT))
+    etag = _room_etag(room)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=_room_info_body(room), media_type="application/json", headers=headers)
+
+
+def _room_etag(room: Room) -> str:
+    return f'"{BOOT_ID}-{room.room_id}-{room.version}"'
+
+
+def _room_info_body(room: Room) -> bytes:
+    if room.info_cache is not None and room.info_cache[0] == room.version:
+        return room.info_cache[1]
+    body = json.dumps(_build_room_info(room), separators=(",", ":")).encode()
+    room.info_cache = (room.version, body)
+    return body
+
+
+def _build_room_info(room: Room) -> dict:
     return {
         "room_id": room.room_id,
         "status": room.status,
@@ -110,28 +183,108 @@ async def room_info(room_id: str) -> dict:
     }
 
 
+def _room_player(player_token: str) -> Tuple[Room, Player]:
+    room = room_manager.get_room_by_token(player_token)
+    if not room:
+        raise HTTPException(status_code=404, detail="room_not_found")
+    player = room_manager.get_player(room, player_token)
+    if not player:
+        raise HTTPException(status_code=403, detail="invalid_token")
+    return room, player
+
+
+@app.post("/api/room/candidates")
+async def room_candidates(request: PlayerTokenRequest, http_request: Request) -> dict:
+    if not admission.allow_ip("room_candidates", _client_ip(http_request)):
+        raise HTTPException(status_code=429, detail="rate_limited")
+    room, player = _room_player(request.player_token)
+    try:
+        candidates = room_manager.candidates(room, player)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"candidates": candidates}
+
+
+@app.post("/api/room/hint")
+async def room_hint(request: PlayerTokenRequest, http_request: Request) -> dict:
+    if not admission.allow_ip("room_hint", _client_ip(http_request)):
+        raise HTTPException(status_code=429, detail="rate_limited")
+    room, player = _room_player(request.player_token)
+    try:
+        hint = room_manager.take_hint(room, player)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if hint is None:
+        raise HTTPException(status_code=400, detail="no_empty_cells")
+    return hint
+
+
 @app.post("/api/puzzle/generate")
-async def puzzle_generate(request: PuzzleRequest) -> dict:
-    puzzle, _, difficulty = generate_puzzle(request.difficulty)
+async def puzzle_generate(request: PuzzleRequest, http_request: Request) -> dict:
+    if not admission.allow_ip("puzzle_generate", _client_ip(http_request)):
+        raise HTTPException(status_code=429, detail="rate_limited")
+    try:
+        puzzle, _, difficulty = await admission.run_generation(generate_puzzle, request.difficulty)
+    except ServerBusy:
+        raise HTTPException(status_code=503, detail="server_busy")
     return {"puzzle": puzzle, "difficulty": difficulty, "puzzle_id": str(uuid.uuid4())}
 
 
+@app.get("/api/replay/{puzzle_id}")
+async def replay(puzzle_id: str) -> StreamingResponse:
+    data = room_manager.replays.get(puzzle_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="replay_not_found")
+
+    def _stream():
+        header = replay_header(data)
+        header["puzzle_id"] = puzzle_id
+        yield json.dumps(header, separators=(",", ":")) + "\n"
+        for chunk in iter_replay_moves(data, REPLAY_CHUNK_MOVES):
+            yield json.dumps(chunk, separators=(",", ":")) + "\n"
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
+
+@app.post("/api/puzzle/validate")
+async def puzzle_validate(request: ValidatePuzzlesRequest, http_request: Request) -> dict:
+    if not admission.allow_ip("puzzle_validate", _client_ip(http_request)):
+        raise HTTPException(status_code=429, detail="rate_limited")
+    try:
+        results = await admission.run_validation(
+            lambda: _until_disconnected(
+                http_request, validate_batch(request.puzzles, request.node_budget, request.time_budget)
+            )
+        )
+    except ServerBusy:
+        raise HTTPException(status_code=503, detail="server_busy")
+    return {"results": results}
+
+
+async def _until_disconnected(http_request: Request, work: Awaitable[T]) -> T:
+    task = asyncio.ensure_future(work)
+    try:
+        while not task.done():
+            await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if not task.done() and await http_request.is_disconnected():
+                raise HTTPException(status_code=499, detail="client_disconnected")
+        return task.result()
+    finally:
+        task.cancel()
+
+
 asgi_app = socketio.ASGIApp(sio, other_asgi_app=app)
 
 
 if STATIC_DIR.exists():
-    assets_dir = STATIC_DIR / "assets"
-    if assets_dir.exists():
-        app.mount("/assets", StaticFiles(directory=assets_dir), name="assets")
+    static_cache = StaticCache(STATIC_DIR)
+    static_cache.load()
 
     @app.get("/{full_path:path}")
-    async def spa_fallback(full_path: str):
+    async def spa_fallback(full_path: str, request: Request):
         if full_path.startswith("api") or full_path.startswith("socket.io"):
             raise HTTPException(status_code=404, detail="not_found")
-        file_path = STATIC_DIR / full_path
-        if file_path.is_file():
-            return FileResponse(file_path)
-        index_path = STATIC_DIR / "index.html"
-        if index_path.is_file():
-            return FileResponse(index_path)
-        raise HTTPException(status_code=404, detail="not_found")
+        asset = static_cache.lookup(full_path)
+        if asset is None:
+            raise HTTPException(status_code=404, detail="not_found")
+        return static_cache.respond(asset, request)
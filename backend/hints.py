@@ -0,0 +1,97 @@
+from typing import Dict, List, Optional
+
+Grid = List[List[int]]
+
+ALL_DIGITS = 0x1FF
+HINTS_PER_GAME = 3
+BOX_OF = [[(r // 3) * 3 + c // 3 for c in range(9)] for r in range(9)]
+UNITS = (
+    [[(r, c) for c in range(9)] for r in range(9)]
+    + [[(r, c) for r in range(9)] for c in range(9)]
+    + [[(b // 3 * 3 + i // 3, b % 3 * 3 + i % 3) for i in range(9)] for b in range(9)]
+)
+
+
+def mask_digits(mask: int) -> List[int]:
+    return [d + 1 for d in range(9) if mask >> d & 1]
+
+
+class CandidateMasks:
+    __slots__ = ("rows", "cols", "boxes")
+
+    def __init__(self) -> None:
+        self.rows = [0] * 9
+        self.cols = [0] * 9
+        self.boxes = [0] * 9
+
+    @classmethod
+    def from_grids(cls, puzzle: Grid, progress: Grid) -> "CandidateMasks":
+        masks = cls()
+        for row in range(9):
+            for col in range(9):
+                value = puzzle[row][col] or progress[row][col]
+                if value:
+                    masks.place(row, col, value)
+        return masks
+
+    def place(self, row: int, col: int, value: int) -> None:
+        bit = 1 << (value - 1)
+        self.rows[row] |= bit
+        self.cols[col] |= bit
+        self.boxes[BOX_OF[row][col]] |= bit
+
+    def clear(self, row: int, col: int, value: int) -> None:
+        bit = ~(1 << (value - 1))
+        self.rows[row] &= bit
+        self.cols[col] &= bit
+        self.boxes[BOX_OF[row][col]] &= bit
+
+    def candidates(self, row: int, col: int) -> int:
+        return ALL_DIGITS & ~(self.rows[row] | self.cols[col] | self.boxes[BOX_OF[row][col]])
+
+
+def _cell_value(puzzle: Grid, progress: Grid, row: int, col: int) -> int:
+    return puzzle[row][col] or progress[row][col]
+
+
+def candidate_grid(masks: CandidateMasks, puzzle: Grid, progress: Grid) -> List[List[List[int]]]:
+    return [
+        [
+            [] if _cell_value(puzzle, progress, row, col) else mask_digits(masks.candidates(row, col))
+            for col in range(9)
+        ]
+        for row in range(9)
+    ]
+
+
+def next_hint(masks: CandidateMasks, puzzle: Grid, progress: Grid, solution: Grid) -> Optional[Dict[str, object]]:
+    empty = [(r, c) for r in range(9) for c in range(9) if not _cell_value(puzzle, progress, r, c)]
+    if not empty:
+        return None
+    best = None
+    best_count = 10
+    for row, col in empty:
+        mask = masks.candidates(row, col)
+        count = bin(mask).count("1")
+        if count == 1:
+            return {"row": row, "col": col, "value": mask.bit_length(), "technique": "naked_single"}
+        if count < best_count:
+            best, best_count = (row, col), count
+    for unit in UNITS:
+        seen_once = 0
+        seen_more = 0
+        for row, col in unit:
+            if _cell_value(puzzle, progress, row, col):
+                continue
+            mask = masks.candidates(row, col)
+            seen_more |= seen_once & mask
+            seen_once |= mask
+        single = seen_once & ~seen_more
+        if not single:
+            continue
+        for row, col in unit:
+            if not _cell_value(puzzle, progress, row, col) and masks.candidates(row, col) & single:
+                digit = (masks.candidates(row, col) & single).bit_length()
+                return {"row": row, "col": col, "value": digit, "technique": "hidden_single"}
+    row, col = best
+    return {"row": row, "col": col, "value": solution[row][col], "technique": "solver"}
@@ -0,0 +1,110 @@
+import struct
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+
+Grid = List[List[int]]
+
+ENTRY = struct.Struct("<HH")
+HEADER = struct.Struct("<dBBB")
+PUZZLE_BYTES = 41
+TICK_SECONDS = 0.1
+MAX_DELTA_TICKS = 0xFFFF
+MAX_REPLAYS = 1_000_000
+MAX_LOG_ENTRIES = 256
+FLAG_TRUNCATED = 0x1
+
+WINNERS = ("host", "guest")
+REASONS = ("completed", "errors")
+
+
+def pack_puzzle(puzzle: Grid) -> bytes:
+    digits = [cell for row in puzzle for cell in row] + [0]
+    return bytes((digits[i] << 4) | digits[i + 1] for i in range(0, 82, 2))
+
+
+def unpack_puzzle(data: bytes) -> Grid:
+    digits: List[int] = []
+    for byte in data:
+        digits.append(byte >> 4)
+        digits.append(byte & 0x0F)
+    return [digits[r * 9 : r * 9 + 9] for r in range(9)]
+
+
+def encode_move(delta_ticks: int, player_index: int, cell: int, value: int, correct: bool) -> bytes:
+    packed = cell | (value << 7) | (int(correct) << 11) | (player_index << 12)
+    return ENTRY.pack(min(delta_ticks, MAX_DELTA_TICKS), packed)
+
+
+def decode_move(data: bytes, offset: int = 0) -> Dict[str, int]:
+    delta_ticks, packed = ENTRY.unpack_from(data, offset)
+    cell = packed & 0x7F
+    return {
+        "delta_ms": delta_ticks * int(TICK_SECONDS * 1000),
+        "player": WINNERS[(packed >> 12) & 0x1],
+        "row": cell // 9,
+        "col": cell % 9,
+        "value": (packed >> 7) & 0x0F,
+        "correct": bool((packed >> 11) & 0x1),
+    }
+
+
+class MoveLog:
+    __slots__ = ("started_at", "last_at", "buffer", "truncated")
+
+    def __init__(self, started_at: Optional[float] = None) -> None:
+        self.started_at = started_at if started_at is not None else time.time()
+        self.last_at = self.started_at
+        self.buffer = bytearray()
+        self.truncated = False
+
+    def record(self, player_index: int, row: int, col: int, value: int, correct: bool) -> None:
+        if len(self.buffer) >= MAX_LOG_ENTRIES * ENTRY.size:
+            self.truncated = True
+            return
+        elapsed = time.time() - self.last_at
+        delta_ticks = min(max(0, int(elapsed / TICK_SECONDS)), MAX_DELTA_TICKS)
+        self.last_at += delta_ticks * TICK_SECONDS
+        self.buffer += encode_move(delta_ticks, player_index, row * 9 + col, value, correct)
+
+    def __len__(self) -> int:
+        return len(self.buffer) // ENTRY.size
+
+
+class ReplayStore:
+    def __init__(self, max_replays: int = MAX_REPLAYS) -> None:
+        self.max_replays = max_replays
+        self.replays: "OrderedDict[str, bytes]" = OrderedDict()
+
+    def archive(self, puzzle_id: str, puzzle: Grid, log: MoveLog, winner: str, reason: str) -> None:
+        flags = FLAG_TRUNCATED if log.truncated else 0
+        header = HEADER.pack(log.started_at, WINNERS.index(winner), REASONS.index(reason), flags)
+        self.replays[puzzle_id] = header + pack_puzzle(puzzle) + bytes(log.buffer)
+        self.replays.move_to_end(puzzle_id)
+        while len(self.replays) > self.max_replays:
+            self.replays.popitem(last=False)
+
+    def get(self, puzzle_id: str) -> Optional[bytes]:
+        return self.replays.get(puzzle_id)
+
+
+def replay_header(data: bytes) -> Dict[str, object]:
+    started_at, winner, reason, flags = HEADER.unpack_from(data, 0)
+    puzzle = unpack_puzzle(data[HEADER.size : HEADER.size + PUZZLE_BYTES])
+    return {
+        "started_at": started_at,
+        "winner": WINNERS[winner],
+        "reason": REASONS[reason],
+        "truncated": bool(flags & FLAG_TRUNCATED),
+        "puzzle": puzzle,
+        "moves": (len(data) - HEADER.size - PUZZLE_BYTES) // ENTRY.size,
+    }
+
+
+def iter_replay_moves(data: bytes, chunk_moves: int) -> Iterator[List[Dict[str, int]]]:
+    offset = HEADER.size + PUZZLE_BYTES
+    step = ENTRY.size * chunk_moves
+    while offset < len(data):
+        end = min(offset + step, len(data))
+        yield [decode_move(data, pos) for pos in range(offset, end, ENTRY.size)]
+        offset = end
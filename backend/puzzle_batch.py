@@ -0,0 +1,218 @@
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from hints import CandidateMasks, next_hint
+from sudoku_generator import Grid, SolveBudgetExceeded, solve
+
+DEFAULT_NODE_BUDGET = 200_000
+DEFAULT_TIME_BUDGET = 2.0
+MAX_NODE_BUDGET = 2_000_000
+MAX_TIME_BUDGET = 10.0
+MAX_BATCH_SIZE = 500
+MAX_PUZZLE_TEXT = 100
+MAX_BATCH_SECONDS = 30.0
+POOL_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+GRADE_SEARCH_NODES = (("hard", 100), ("very_hard", 2_000))
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def parse_puzzle(text: str) -> Optional[Grid]:
+    text = text.strip()
+    if len(text) != 81:
+        return None
+    digits: List[int] = []
+    for char in text:
+        if char in ".0":
+            digits.append(0)
+        elif char in "123456789":
+            digits.append(int(char))
+        else:
+            return None
+    return [digits[r * 9 : r * 9 + 9] for r in range(9)]
+
+
+def format_grid(grid: Grid) -> str:
+    return "".join(str(cell) for row in grid for cell in row)
+
+
+def grade_puzzle(puzzle: Grid, solution: Grid, search_nodes: int) -> str:
+    progress = [[0 for _ in range(9)] for _ in range(9)]
+    masks = CandidateMasks.from_grids(puzzle, progress)
+    grade = "easy"
+    while True:
+        hint = next_hint(masks, puzzle, progress, solution)
+        if hint is None:
+            return grade
+        if hint["technique"] == "solver":
+            break
+        if hint["technique"] == "hidden_single":
+            grade = "medium"
+        progress[hint["row"]][hint["col"]] = hint["value"]
+        masks.place(hint["row"], hint["col"], hint["value"])
+    for name, limit in GRADE_SEARCH_NODES:
+        if search_nodes <= limit:
+            return name
+    return "extreme"
+
+
+def _empty_result(text: str, status: str) -> Dict[str, Any]:
+    return {
+        "puzzle": text,
+        "status": status,
+        "solvable": None,
+        "unique": None,
+        "solution": None,
+        "grade": None,
+        "nodes": 0,
+    }
+
+
+def validate_puzzle(text: str, node_budget: int, time_budget: float) -> Dict[str, Any]:
+    result = _empty_result(text, "ok")
+    puzzle = parse_puzzle(text)
+    if puzzle is None:
+        result["status"] = "invalid"
+        return result
+    try:
+        solved = solve(puzzle, limit=2, node_budget=node_budget, time_budget=time_budget)
+    except SolveBudgetExceeded:
+        result["status"] = "budget_exceeded"
+        return result
+    result["nodes"] = solved.nodes
+    result["solvable"] = solved.count > 0
+    result["unique"] = solved.count == 1
+    if solved.solution is not None:
+        result["solution"] = format_grid(solved.solution)
+    if solved.count == 1 and solved.solution is not None:
+        result["grade"] = grade_puzzle(puzzle, solved.solution, solved.nodes)
+    return result
+
+
+def clamp_budgets(node_budget: Optional[int], time_budget: Optional[float], count: int = 1) -> Tuple[int, float]:
+    nodes = min(node_budget or DEFAULT_NODE_BUDGET, MAX_NODE_BUDGET)
+    seconds = min(time_budget or DEFAULT_TIME_BUDGET, MAX_TIME_BUDGET)
+    seconds = min(seconds, MAX_BATCH_SECONDS * POOL_WORKERS / max(1, count))
+    return nodes, seconds
+
+
+def _pool_context() -> multiprocessing.context.BaseContext:
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS, mp_context=_pool_context())
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    if _pool is pool:
+        _pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit_all(
+    loop: asyncio.AbstractEventLoop, puzzles: List[str], nodes: int, seconds: float
+) -> Tuple[ProcessPoolExecutor, List["asyncio.Future[Dict[str, Any]]"]]:
+    for attempt in range(2):
+        pool = get_pool()
+        try:
+            return pool, [loop.run_in_executor(pool, validate_puzzle, text, nodes, seconds) for text in puzzles]
+        except BrokenProcessPool:
+            logger.warning("puzzle validation pool was broken, recreating it")
+            _discard_pool(pool)
+            if attempt:
+                raise
+    raise BrokenProcessPool()
+
+
+async def validate_batch(
+    puzzles: List[str],
+    node_budget: Optional[int] = None,
+    time_budget: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    nodes, seconds = clamp_budgets(node_budget, time_budget, len(puzzles))
+    loop = asyncio.get_running_loop()
+    pool, futures = _submit_all(loop, puzzles, nodes, seconds)
+    try:
+        await asyncio.wait(futures, timeout=MAX_BATCH_SECONDS)
+    finally:
+        for future in futures:
+            future.cancel()
+    results: List[Dict[str, Any]] = []
+    broken = False
+    for text, future in zip(puzzles, futures):
+        if not future.done() or future.cancelled():
+            results.append(_empty_result(text, "budget_exceeded"))
+            continue
+        exc = future.exception()
+        if exc is None:
+            results.append(future.result())
+            continue
+        if isinstance(exc, BrokenProcessPool):
+            broken = True
+        else:
+            logger.error("puzzle validation failed", exc_info=exc)
+        results.append(_empty_result(text, "error"))
+    if broken:
+        logger.error("puzzle validation worker died, recreating the pool")
+        _discard_pool(pool)
+    return results
+
+
+def _read_puzzles(lines: Iterable[str]) -> List[str]:
+    return [line.strip() for line in lines if line.strip() and not line.startswith("#")]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Solve and validate 81-character sudoku puzzles in bulk.")
+    parser.add_argument("input", nargs="?", default="-", help="file with one puzzle per line, '-' for stdin")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--node-budget", type=int, default=DEFAULT_NODE_BUDGET)
+    parser.add_argument("--time-budget", type=float, default=DEFAULT_TIME_BUDGET)
+    args = parser.parse_args(argv)
+
+    if args.input == "-":
+        puzzles = _read_puzzles(sys.stdin)
+    else:
+        with open(args.input, encoding="utf-8") as handle:
+            puzzles = _read_puzzles(handle)
+
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        count = len(puzzles)
+        results = pool.map(
+            validate_puzzle,
+            puzzles,
+            [args.node_budget] * count,
+            [args.time_budget] * count,
+            chunksize=max(1, count // (max(1, args.workers) * 4)),
+        )
+        for result in results:
+            print(json.dumps(result, separators=(",", ":")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
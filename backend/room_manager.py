@@ -1,9 +1,12 @@
+import asyncio
 import random
 import time
 import uuid
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
+from hints import HINTS_PER_GAME, CandidateMasks, candidate_grid, next_hint
+from move_log import MoveLog, ReplayStore
 from sudoku_generator import generate_puzzle
 
 Grid = List[List[int]]
@@ -36,6 +39,8 @@ class Player:
     ready: bool = False
     last_seen: float = field(default_factory=time.time)
     disconnected_at: Optional[float] = None
+    masks: Optional[CandidateMasks] = None
+    hints_used: int = 0
 
     def elapsed_seconds(self) -> int:
         elapsed = self.timer
@@ -58,6 +63,9 @@ class Room:
     started_at: Optional[float] = None
     paused_at: Optional[float] = None
     timer_task: Optional[object] = None
+    move_log: Optional[MoveLog] = None
+    version: int = 0
+    info_cache: Optional[Tuple[int, bytes]] = None
 
     def players(self) -> List[Player]:
         return [p for p in [self.host, self.guest] if p is not None]
@@ -67,6 +75,8 @@ class RoomManager:
     def __init__(self) -> None:
         self.rooms: Dict[str, Room] = {}
         self.token_index: Dict[str, str] = {}
+        self.replays = ReplayStore()
+        self.version_waiters: Dict[str, Set["asyncio.Future[None]"]] = {}
 
     def create_room(self, nickname: str, difficulty: str) -> Tuple[Room, Player]:
         room_id = generate_room_id(self.rooms)
@@ -85,8 +95,31 @@ class RoomManager:
         guest = Player(player_id=str(uuid.uuid4()), nickname=nickname, token=str(uuid.uuid4()))
         room.guest = guest
         self.token_index[guest.token] = room_id
+        self.touch(room)
         return room, guest
 
+    def touch(self, room: Room) -> None:
+        room.version += 1
+        for waiter in self.version_waiters.pop(room.room_id, ()):
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def wait_for_change(self, room: Room, version: int, timeout: float) -> bool:
+        if room.version != version:
+            return True
+        waiter = asyncio.get_running_loop().create_future()
+        waiters = self.version_waiters.setdefault(room.room_id, set())
+        waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            waiters.discard(waiter)
+            if not waiters and self.version_waiters.get(room.room_id) is waiters:
+                del self.version_waiters[room.room_id]
+        return room.version != version
+
     def get_room(self, room_id: str) -> Optional[Room]:
         return self.rooms.get(room_id)
 
@@ -110,8 +143,8 @@ class RoomManager:
             return room.host
         return None
 
-    def start_game(self, room: Room) -> None:
-        puzzle, solution, difficulty = generate_puzzle(room.difficulty)
+    def start_game(self, room: Room, generated: Optional[Tuple[Grid, Grid, str]] = None) -> None:
+        puzzle, solution, difficulty = generated or generate_puzzle(room.difficulty)
         room.difficulty = difficulty
         room.puzzle_id = str(uuid.uuid4())
         room.puzzle = puzzle
@@ -119,6 +152,7 @@ class RoomManager:
         room.status = "playing"
         room.started_at = time.time()
         room.paused_at = None
+        room.move_log = MoveLog(room.started_at)
         for player in room.players():
             player.progress = empty_progress()
             player.errors = 0
@@ -126,6 +160,9 @@ class RoomManager:
             player.timer = 0
             player.last_start = time.time()
             player.ready = False
+            player.masks = CandidateMasks.from_grids(puzzle, player.progress)
+            player.hints_used = 0
+        self.touch(room)
 
     def pause_room(self, room: Room) -> None:
         if room.status != "playing":
@@ -136,6 +173,7 @@ class RoomManager:
             if player.last_start is not None:
                 player.timer = player.elapsed_seconds()
                 player.last_start = None
+        self.touch(room)
 
     def resume_room(self, room: Room) -> None:
         if room.status != "paused":
@@ -145,6 +183,53 @@ class RoomManager:
         now = time.time()
         for player in room.players():
             player.last_start = now
+        self.touch(room)
+
+    def finish_room(self, room: Room) -> None:
+        room.status = "finished"
+        for player in room.players():
+            if player.last_start is not None:
+                player.timer = player.elapsed_seconds()
+                player.last_start = None
+        self.touch(room)
+
+    def reset_room(self, room: Room) -> None:
+        room.status = "waiting"
+        room.puzzle = None
+        room.solution = None
+        room.puzzle_id = None
+        room.started_at = None
+        room.paused_at = None
+        room.move_log = None
+        for player in room.players():
+            player.ready = False
+            player.progress = empty_progress()
+            player.errors = 0
+            player.timer = 0
+            player.last_start = None
+            player.completed = False
+            player.masks = None
+            player.hints_used = 0
+        self.touch(room)
+
+    def set_ready(self, room: Room, player: Player, ready: bool) -> None:
+        player.ready = ready
+        self.touch(room)
+
+    def mark_online(self, room: Room, player: Player, sid: Optional[str] = None) -> None:
+        if sid is not None:
+            player.sid = sid
+        player.connection_status = "online"
+        player.disconnected_at = None
+        player.last_seen = time.time()
+        self.touch(room)
+
+    def mark_offline(self, room: Room, player: Player, now: Optional[float] = None) -> None:
+        player.connection_status = "offline"
+        player.disconnected_at = now if now is not None else time.time()
+        if room.status == "playing":
+            self.pause_room(room)
+        self.touch(room)
 
     def is_ready(self, room: Room) -> bool:
         if not room.guest:
@@ -157,3 +242,45 @@ class RoomManager:
         empty_cells = sum(1 for row in room.puzzle for cell in row if cell == 0)
         filled = sum(1 for row in player.progress for cell in row if cell != 0)
         return filled >= empty_cells
+
+    def record_move(self, room: Room, player: Player, row: int, col: int, value: int, correct: bool) -> None:
+        if room.move_log is None:
+            return
+        player_index = 0 if player is room.host else 1
+        room.move_log.record(player_index, row, col, value, correct)
+
+    def archive_replay(self, room: Room, winner: str, reason: str) -> None:
+        if room.move_log is None or not room.puzzle_id or not room.puzzle:
+            return
+        self.replays.archive(room.puzzle_id, room.puzzle, room.move_log, winner, reason)
+        room.move_log = None
+
+    def set_cell(self, player: Player, row: int, col: int, value: int) -> bool:
+        previous = player.progress[row][col]
+        if previous == value:
+            return False
+        player.progress[row][col] = value
+        if player.masks is None:
+            return True
+        if previous:
+            player.masks.clear(row, col, previous)
+        if value:
+            player.masks.place(row, col, value)
+        return True
+
+    def candidates(self, room: Room, player: Player) -> List[List[List[int]]]:
+        if room.status != "playing" or not room.puzzle or player.masks is None:
+            raise ValueError("game_not_playing")
+        return candidate_grid(player.masks, room.puzzle, player.progress)
+
+    def take_hint(self, room: Room, player: Player) -> Optional[Dict[str, object]]:
+        if room.status != "playing" or not room.puzzle or not room.solution or player.masks is None:
+            raise ValueError("game_not_playing")
+        if player.hints_used >= HINTS_PER_GAME:
+            raise ValueError("hint_budget_exhausted")
+        hint = next_hint(player.masks, room.puzzle, player.progress, room.solution)
+        if hint is None:
+            return None
+        player.hints_used += 1
+        hint["hints_left"] = HINTS_PER_GAME - player.hints_used
+        return hint
@@ -0,0 +1,148 @@
+import gzip
+import hashlib
+import mimetypes
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+IMMUTABLE_PREFIX = "assets/"
+ENCODING_PREFERENCE = ("br", "gzip")
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+MIN_COMPRESS_SIZE = 256
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+    "application/manifest+json",
+)
+
+
+@dataclass
+class CachedAsset:
+    body: bytes
+    media_type: str
+    etag: str
+    cache_control: str
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+
+def _is_compressible(media_type: str) -> bool:
+    return media_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _load_asset(path: Path, rel_path: str) -> CachedAsset:
+    body = path.read_bytes()
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    asset = CachedAsset(
+        body=body,
+        media_type=media_type,
+        etag=hashlib.sha256(body).hexdigest()[:32],
+        cache_control=IMMUTABLE_CACHE if rel_path.startswith(IMMUTABLE_PREFIX) else REVALIDATE_CACHE,
+    )
+    if len(body) < MIN_COMPRESS_SIZE or not _is_compressible(media_type):
+        return asset
+    if brotli is not None:
+        compressed = brotli.compress(body, quality=11)
+        if len(compressed) < len(body):
+            asset.encoded["br"] = compressed
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+    if len(compressed) < len(body):
+        asset.encoded["gzip"] = compressed
+    return asset
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def _choose_encoding(header: str, available: Dict[str, bytes]) -> str:
+    accepted = _accepted_encodings(header)
+    wildcard = accepted.get("*", 0.0)
+    best = ""
+    best_quality = 0.0
+    for name in ENCODING_PREFERENCE:
+        if name not in available:
+            continue
+        quality = accepted.get(name, wildcard)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class StaticCache:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.assets: Dict[str, CachedAsset] = {}
+        self.index: Optional[CachedAsset] = None
+
+    def load(self) -> None:
+        assets: Dict[str, CachedAsset] = {}
+        for path in sorted(self.root.rglob("*")):
+            if not path.is_file():
+                continue
+            rel_path = path.relative_to(self.root).as_posix()
+            assets[rel_path] = _load_asset(path, rel_path)
+        self.assets = assets
+        self.index = assets.get("index.html")
+
+    def lookup(self, rel_path: str) -> Optional[CachedAsset]:
+        asset = self.assets.get(rel_path)
+        if asset is not None:
+            return asset
+        if rel_path.startswith(IMMUTABLE_PREFIX):
+            return None
+        return self.index
+
+    def respond(self, asset: CachedAsset, request: Request) -> Response:
+        encoding = ""
+        body = asset.body
+        if asset.encoded:
+            encoding = _choose_encoding(request.headers.get("accept-encoding", ""), asset.encoded)
+            if encoding:
+                body = asset.encoded[encoding]
+        etag = f'"{asset.etag}-{encoding}"' if encoding else f'"{asset.etag}"'
+        headers = {"ETag": etag, "Cache-Control": asset.cache_control}
+        if asset.encoded:
+            headers["Vary"] = "Accept-Encoding"
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=asset.media_type, headers=headers)
@@ -1,5 +1,7 @@
 import random
+import time
 from copy import deepcopy
+from dataclasses import dataclass
 from typing import List, Optional, Tuple
 
 Grid = List[List[int]]
@@ -12,6 +14,20 @@ DIFFICULTY_RANGES = {
     "extreme": (20, 25),
 }
 
+ALL_DIGITS = 0x1FF
+DEADLINE_CHECK_NODES = 1024
+
+
+class SolveBudgetExceeded(Exception):
+    pass
+
+
+@dataclass
+class SolveResult:
+    count: int
+    solution: Optional[Grid]
+    nodes: int
+
 
 def normalize_difficulty(difficulty: str) -> str:
     key = (difficulty or "medium").lower().replace(" ", "_")
@@ -72,25 +88,83 @@ def remove_numbers(solution: Grid, difficulty: str) -> Grid:
 
 
 def count_solutions(board: Grid, limit: int = 2) -> int:
-    copied = deepcopy(board)
-    return _count_solutions_inplace(copied, limit)
-
-
-def _count_solutions_inplace(board: Grid, limit: int) -> int:
-    empty = _find_empty(board)
-    if not empty:
-        return 1
-    row, col = empty
-    count = 0
-    for num in range(1, 10):
-        if _is_valid(board, row, col, num):
-            board[row][col] = num
-            count += _count_solutions_inplace(board, limit)
-            if count >= limit:
-                board[row][col] = 0
-                return count
-            board[row][col] = 0
-    return count
+    return solve(board, limit).count
+
+
+def solve(
+    board: Grid,
+    limit: int = 2,
+    node_budget: Optional[int] = None,
+    time_budget: Optional[float] = None,
+) -> SolveResult:
+    cells = [[board[r][c] for c in range(9)] for r in range(9)]
+    rows = [0] * 9
+    cols = [0] * 9
+    boxes = [0] * 9
+    empty: List[Tuple[int, int, int]] = []
+    for r in range(9):
+        for c in range(9):
+            value = cells[r][c]
+            b = (r // 3) * 3 + c // 3
+            if not value:
+                empty.append((r, c, b))
+                continue
+            bit = 1 << (value - 1)
+            if rows[r] & bit or cols[c] & bit or boxes[b] & bit:
+                return SolveResult(count=0, solution=None, nodes=0)
+            rows[r] |= bit
+            cols[c] |= bit
+            boxes[b] |= bit
+
+    deadline = time.monotonic() + time_budget if time_budget is not None else None
+    state = {"count": 0, "nodes": 0, "solution": None}
+
+    def _search(remaining: int) -> None:
+        if remaining == 0:
+            state["count"] += 1
+            if state["solution"] is None:
+                state["solution"] = [row[:] for row in cells]
+            return
+        state["nodes"] += 1
+        if node_budget is not None and state["nodes"] > node_budget:
+            raise SolveBudgetExceeded()
+        if deadline is not None and state["nodes"] % DEADLINE_CHECK_NODES == 0 and time.monotonic() > deadline:
+            raise SolveBudgetExceeded()
+        best = 0
+        best_mask = 0
+        best_count = 10
+        for i in range(remaining):
+            r, c, b = empty[i]
+            mask = ALL_DIGITS & ~(rows[r] | cols[c] | boxes[b])
+            count = bin(mask).count("1")
+            if count < best_count:
+                best, best_mask, best_count = i, mask, count
+                if count <= 1:
+                    break
+        if best_count == 0:
+            return
+        last = remaining - 1
+        empty[best], empty[last] = empty[last], empty[best]
+        r, c, b = empty[last]
+        mask = best_mask
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            rows[r] |= bit
+            cols[c] |= bit
+            boxes[b] |= bit
+            cells[r][c] = bit.bit_length()
+            _search(last)
+            rows[r] &= ~bit
+            cols[c] &= ~bit
+            boxes[b] &= ~bit
+            cells[r][c] = 0
+            if state["count"] >= limit:
+                break
+        empty[best], empty[last] = empty[last], empty[best]
+
+    _search(len(empty))
+    return SolveResult(count=state["count"], solution=state["solution"], nodes=state["nodes"])
 
 
 def _find_empty(board: Grid) -> Optional[Tuple[int, int]]:
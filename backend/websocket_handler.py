@@ -1,10 +1,12 @@
 import asyncio
 import time
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 import socketio
 
+from admission import AdmissionControl, ServerBusy, client_ip
 from room_manager import Room, RoomManager
+from sudoku_generator import generate_puzzle
 
 
 HEARTBEAT_TIMEOUT = 15
@@ -42,8 +44,21 @@ def build_state_payload(room: Room, player_token: str) -> Dict[str, Any]:
     }
 
 
-def register_socket_handlers(sio: socketio.AsyncServer, manager: RoomManager) -> None:
+def register_socket_handlers(
+    sio: socketio.AsyncServer,
+    manager: RoomManager,
+    admission: Optional[AdmissionControl] = None,
+) -> None:
     sid_to_token: Dict[str, str] = {}
+    sid_to_ip: Dict[str, str] = {}
+    admission = admission or AdmissionControl()
+
+    async def _admit(event: str, sid: str, notify: bool = True) -> bool:
+        if admission.allow_socket(event, sid, sid_to_ip.get(sid)):
+            return True
+        if notify:
+            await sio.emit("rate_limited", {"event": event}, to=sid)
+        return False
 
     async def _start_timer_task(room: Room) -> None:
         if room.timer_task and not getattr(room.timer_task, "done", lambda: True)():
@@ -60,13 +75,11 @@ def register_socket_handlers(sio: socketio.AsyncServer, manager: RoomManager) ->
         room.timer_task = asyncio.create_task(_loop())
 
     async def _handle_game_over(room: Room, winner_token: str, reason: str) -> None:
-        room.status = "finished"
-        for player in room.players():
-            if player.last_start is not None:
-                player.timer = player.elapsed_seconds()
-                player.last_start = None
+        manager.finish_room(room)
+        winner = "host" if room.host.token == winner_token else "guest"
+        manager.archive_replay(room, winner, reason)
         payload = {
-            "winner": "host" if room.host.token == winner_token else "guest",
+            "winner": winner,
             "reason": reason,
             "timers": build_timer_payload(room),
         }
@@ -74,10 +87,16 @@ def register_socket_handlers(sio: socketio.AsyncServer, manager: RoomManager) ->
 
     @sio.event
     async def connect(sid, environ):
+        ip = client_ip(environ.get("asgi.scope"))
+        if not admission.allow_ip("connect", ip):
+            return False
+        sid_to_ip[sid] = ip
         await sio.emit("connected", {"ok": True}, to=sid)
 
     @sio.event
     async def join_room(sid, data):
+        if not await _admit("join_room", sid):
+            return
         room_id = data.get("room_id")
         token = data.get("player_token")
         if not room_id or not token:
@@ -91,10 +110,7 @@ def register_socket_handlers(sio: socketio.AsyncServer, manager: RoomManager) ->
             await sio.emit("error", {"message": "invalid_token"}, to=sid)
             return
         was_offline = player.connection_status == "offline"
-        player.sid = sid
-        player.connection_status = "online"
-        player.disconnected_at = None
-        player.last_seen = time.time()
+        manager.mark_online(room, player, sid)
         sid_to_token[sid] = token
         await sio.enter_room(sid, room_id)
         await sio.emit(
@@ -117,6 +133,8 @@ def register_socket_handlers(sio: socketio.AsyncServer, manager: RoomManager) ->
 
     @sio.event
     async def ready(sid, data):
+        if not await _admit("ready", sid):
+            return
         token = data.get("player_token")
         if not token:
             return
@@ -126,10 +144,18 @@ def register_socket_handlers(sio: socketio.AsyncServer, manager: RoomManager) ->
         player = manager.get_player(room, token)
         if not player:
             return
-        player.ready = True
+        manager.set_ready(room, player, True)
         await sio.emit("player_ready", {"player_id": player.player_id}, room=room.room_id)
         if manager.is_ready(room):
-            manager.start_game(room)
+            try:
+                generated = await admission.run_generation(generate_puzzle, room.difficulty)
+            except ServerBusy:
+                manager.set_ready(room, player, False)
+                await sio.emit("rate_limited", {"event": "ready"}, to=sid)
+                return
+            if not manager.is_ready(room):
+                return
+            manager.start_game(room, generated)
             await sio.emit(
                 "game_start",
                 {
@@ -144,6 +170,8 @@ def register_socket_handlers(sio: socketio.AsyncServer, manager: RoomManager) ->
 
     @sio.event
     async def fill_cell(sid, data):
+        if not await _admit("fill_cell", sid):
+            return
         token = data.get("player_token")
         if not token:
             return
@@ -169,7 +197,8 @@ def register_socket_handlers(sio: socketio.AsyncServer, manager: RoomManager) ->
 
         if value == 0:
             if player.progress[row][col] != 0:
-                player.progress[row][col] = 0
+                manager.set_cell(player, row, col, 0)
+                manager.record_move(room, player, row, col, 0, True)
                 if opponent and opponent.sid:
                     await sio.emit(
                         "opponent_progress",
@@ -191,7 +220,8 @@ def register_socket_handlers(sio: socketio.AsyncServer, manager: RoomManager) ->
             return
 
         if room.solution[row][col] == value:
-            player.progress[row][col] = value
+            if manager.set_cell(player, row, col, value):
+                manager.record_move(room, player, row, col, value, True)
             await sio.emit(
                 "cell_result",
                 {
@@ -215,6 +245,7 @@ def register_socket_handlers(sio: socketio.AsyncServer, manager: RoomManager) ->
             return
 
         player.errors += 1
+        manager.record_move(room, player, row, col, value, False)
         await sio.emit(
             "cell_result",
             {
@@ -230,8 +261,52 @@ def register_socket_handlers(sio: socketio.AsyncServer, manager: RoomManager) ->
         if player.errors >= 3 and opponent:
             await _handle_game_over(room, opponent.token, "errors")
 
+    @sio.event
+    async def request_candidates(sid, data):
+        if not await _admit("request_candidates", sid):
+            return
+        token = data.get("player_token") if isinstance(data, dict) else None
+        if not token:
+            return
+        room = manager.get_room_by_token(token)
+        if not room:
+            return
+        player = manager.get_player(room, token)
+        if not player:
+            return
+        try:
+            candidates = manager.candidates(room, player)
+        except ValueError as exc:
+            await sio.emit("error", {"message": str(exc)}, to=sid)
+            return
+        await sio.emit("candidates", {"candidates": candidates}, to=sid)
+
+    @sio.event
+    async def request_hint(sid, data):
+        if not await _admit("request_hint", sid):
+            return
+        token = data.get("player_token") if isinstance(data, dict) else None
+        if not token:
+            return
+        room = manager.get_room_by_token(token)
+        if not room:
+            return
+        player = manager.get_player(room, token)
+        if not player:
+            return
+        try:
+            hint = manager.take_hint(room, player)
+        except ValueError as exc:
+            await sio.emit("hint_denied", {"reason": str(exc)}, to=sid)
+            return
+        if hint is None:
+            return
+        await sio.emit("hint", hint, to=sid)
+
     @sio.event
     async def heartbeat(sid, data):
+        if not await _admit("heartbeat", sid, notify=False):
+            return
         token = data.get("player_token") if isinstance(data, dict) else None
         if not token:
             return
@@ -244,8 +319,7 @@ def register_socket_handlers(sio: socketio.AsyncServer, manager: RoomManager) ->
         was_offline = player.connection_status == "offline"
         player.last_seen = time.time()
         if was_offline:
-            player.connection_status = "online"
-            player.disconnected_at = None
+            manager.mark_online(room, player)
             await sio.emit("player_reconnected", {"player_id": player.player_id}, room=room.room_id)
             if (
                 room.status == "paused"
@@ -258,6 +332,8 @@ def register_socket_handlers(sio: socketio.AsyncServer, manager: RoomManager) ->
 
     @sio.event
     async def reconnect(sid, data):
+        if not await _admit("reconnect", sid):
+            return
         token = data.get("player_token")
         if not token:
             return
@@ -269,10 +345,7 @@ def register_socket_handlers(sio: socketio.AsyncServer, manager: RoomManager) ->
         if not player:
             await sio.emit("error", {"message": "invalid_token"}, to=sid)
             return
-        player.sid = sid
-        player.connection_status = "online"
-        player.disconnected_at = None
-        player.last_seen = time.time()
+        manager.mark_online(room, player, sid)
         sid_to_token[sid] = token
         await sio.enter_room(sid, room.room_id)
         await sio.emit("player_reconnected", {"player_id": player.player_id}, room=room.room_id)
@@ -284,29 +357,24 @@ def register_socket_handlers(sio: socketio.AsyncServer, manager: RoomManager) ->
 
     @sio.event
     async def restart_game(sid, data):
+        if not await _admit("restart_game", sid):
+            return
         token = data.get("player_token")
         if not token:
             return
         room = manager.get_room_by_token(token)
         if not room:
             return
-        room.status = "waiting"
-        room.puzzle = None
-        room.solution = None
-        room.puzzle_id = None
-        room.started_at = None
-        room.paused_at = None
-        for player in room.players():
-            player.ready = False
-            player.progress = [[0 for _ in range(9)] for _ in range(9)]
-            player.errors = 0
-            player.timer = 0
-            player.last_start = None
-            player.completed = False
+        if not admission.allow_room("restart_game", room.room_id):
+            await sio.emit("rate_limited", {"event": "restart_game"}, to=sid)
+            return
+        manager.reset_room(room)
         await sio.emit("room_reset", {"room_id": room.room_id}, room=room.room_id)
 
     @sio.event
     async def disconnect(sid):
+        sid_to_ip.pop(sid, None)
+        admission.forget_sid(sid)
         token = sid_to_token.pop(sid, None)
         if not token:
             return
@@ -316,10 +384,7 @@ def register_socket_handlers(sio: socketio.AsyncServer, manager: RoomManager) ->
         player = manager.get_player(room, token)
         if not player:
             return
-        player.connection_status = "offline"
-        player.disconnected_at = time.time()
-        if room.status == "playing":
-            manager.pause_room(room)
+        manager.mark_offline(room, player)
         await sio.emit(
             "player_disconnected",
             {"player_id": player.player_id},
@@ -352,10 +417,7 @@ async def heartbeat_monitor(sio: socketio.AsyncServer, manager: RoomManager) ->
         for room in list(manager.rooms.values()):
             for player in room.players():
                 if player.connection_status == "online" and now - player.last_seen > HEARTBEAT_TIMEOUT:
-                    player.connection_status = "offline"
-                    player.disconnected_at = now
-                    if room.status == "playing":
-                        manager.pause_room(room)
+                    manager.mark_offline(room, player, now)
                     await sio.emit(
                         "player_disconnected",
                         {"player_id": player.player_id},